@@ -12,13 +12,36 @@ class Settings:
     # CORS Settings
     CORS_ORIGINS: list = ["http://localhost:5173", "http://localhost:3000", "http://127.0.0.1:5173"]
     
+    # Compression Settings
+    GZIP_MINIMUM_SIZE: int = 1024  # Bytes
+    GZIP_COMPRESS_LEVEL: int = 6
+    GZIP_EXCLUDED_PATHS: list = ["/api/export-docx"]  # DOCX files are already zip-compressed
+    
     # AI Settings
     GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
     GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_MAX_CONCURRENCY: int = 8  # Concurrent requests allowed against the Gemini quota
+    
+    # Paper Cache Settings (skip Gemini for repeated content)
+    PAPER_CACHE_SIZE: int = 256
+    USE_SEMANTIC_CACHE: bool = os.getenv("USE_SEMANTIC_CACHE", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Minimum cosine similarity for a hit
+    EMBEDDING_MODEL: str = "models/text-embedding-004"
+    PAPER_CACHE_PATH: Optional[str] = os.getenv("PAPER_CACHE_PATH")  # Persist cache here on shutdown
     
     # Document Settings
     MAX_CONTENT_LENGTH: int = 100000  # Max characters for raw content
     MAX_IMAGES: int = 10
     MAX_IMAGE_SIZE_MB: int = 5
+    IMAGE_MAX_DIMENSION_PX: int = 900  # 3 in figure width at 300 dpi
+    IMAGE_MAX_PIXELS: int = 25_000_000  # Larger images are rejected before decoding
+    IMAGE_DECODE_CONCURRENCY: int = 2  # Images decoded at once across all requests
+    IMAGE_JPEG_QUALITY: int = 85
+    
+    DOCX_WORKERS: int = os.cpu_count() or 2  # Processes used for DOCX generation
+    
+    # Session Settings (in-memory, expire automatically)
+    MAX_SESSIONS: int = 1024
+    SESSION_TTL_SECONDS: int = 3600
 
 settings = Settings()
@@ -5,11 +5,38 @@ FastAPI application for converting raw content into
 IEEE-formatted research papers.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 from config import settings
 from routes.paper import router as paper_router
+from services.docx_generator import get_docx_pool, shutdown_docx_pool
+from services.paper_cache import get_paper_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up the paper cache and DOCX worker pool; persist and stop them on shutdown."""
+    cache = get_paper_cache()
+    get_docx_pool()
+    yield
+    shutdown_docx_pool()
+    if settings.PAPER_CACHE_PATH:
+        cache.save(settings.PAPER_CACHE_PATH)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip middleware that skips paths serving already-compressed files."""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in settings.GZIP_EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -17,7 +44,9 @@ app = FastAPI(
     version=settings.API_VERSION,
     description=settings.API_DESCRIPTION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -29,6 +58,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON responses (e.g. generated papers)
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL
+)
+
 # Include routers
 app.include_router(paper_router)
 
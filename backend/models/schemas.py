@@ -31,11 +31,17 @@ class GeneratePaperResponse(BaseModel):
     """Response model for paper generation."""
     success: bool
     paper: Optional[StructuredPaper] = None
+    session_id: Optional[str] = Field(default=None, description="ID of the session holding the uploaded images")
     error: Optional[str] = None
 
 class ExportDocxRequest(BaseModel):
     """Request model for .docx export."""
     paper: StructuredPaper
+    session_id: Optional[str] = Field(default=None, description="Session ID returned by generate-paper")
+
+class ClearSessionRequest(BaseModel):
+    """Request model for clearing a session."""
+    session_id: str = Field(..., description="Session ID returned by generate-paper")
     
 class MessageResponse(BaseModel):
     """Generic message response."""
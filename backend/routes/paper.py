@@ -2,26 +2,44 @@
 API Routes for Paper Generation.
 """
 
+import asyncio
 import io
-from typing import List, Optional
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Tuple
+from cachetools import TTLCache
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import StreamingResponse
 
 from models.schemas import (
     GeneratePaperRequest,
     GeneratePaperResponse,
+    ExportDocxRequest,
+    ClearSessionRequest,
     StructuredPaper,
     MessageResponse
 )
 from services.ai_processor import get_ai_processor
-from services.docx_generator import get_docx_generator
+from services.docx_generator import generate_docx_bytes, get_docx_pool, reset_docx_pool
+from services.image_processor import PreparedImage, prepare_image
 from config import settings
 
 router = APIRouter(prefix="/api", tags=["Paper Generation"])
 
-# Temporary storage for images during session (in-memory only, no persistence)
-_session_images: List[bytes] = []
-_session_paper: Optional[StructuredPaper] = None
+# Temporary storage for papers and images per session (in-memory only, no persistence)
+_sessions: "TTLCache[str, Tuple[StructuredPaper, List[PreparedImage]]]" = TTLCache(
+    maxsize=settings.MAX_SESSIONS,
+    ttl=settings.SESSION_TTL_SECONDS
+)
+
+# Bounds peak decode memory across concurrent uploads
+_decode_semaphore = asyncio.Semaphore(settings.IMAGE_DECODE_CONCURRENCY)
+
+
+async def _prepare_image(data: bytes) -> PreparedImage:
+    """Downscale an uploaded image in a worker thread."""
+    async with _decode_semaphore:
+        return await asyncio.to_thread(prepare_image, data)
 
 
 @router.post("/generate-paper", response_model=GeneratePaperResponse)
@@ -34,10 +52,8 @@ async def generate_paper(
     
     - Accepts raw text and optional images
     - Uses AI to structure content into IEEE sections
-    - Returns structured paper data for preview
+    - Returns structured paper data for preview and a session ID for export
     """
-    global _session_images, _session_paper
-    
     # Validate content length
     if len(raw_content) > settings.MAX_CONTENT_LENGTH:
         raise HTTPException(
@@ -52,27 +68,42 @@ async def generate_paper(
             detail=f"Maximum {settings.MAX_IMAGES} images allowed"
         )
     
+    max_image_bytes = settings.MAX_IMAGE_SIZE_MB * 1024 * 1024
+    
     try:
-        # Read and store images
-        _session_images = []
+        # Reject oversized uploads before reading them
         for img in images:
-            img_data = await img.read()
-            # Validate image size
-            if len(img_data) > settings.MAX_IMAGE_SIZE_MB * 1024 * 1024:
+            if img.size is not None and img.size > max_image_bytes:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Image {img.filename} exceeds maximum size of {settings.MAX_IMAGE_SIZE_MB}MB"
+                )
+        
+        # Read all images concurrently
+        image_data = await asyncio.gather(*(img.read() for img in images))
+        
+        # Validate image sizes
+        for img, img_data in zip(images, image_data):
+            if len(img_data) > max_image_bytes:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Image {img.filename} exceeds maximum size of {settings.MAX_IMAGE_SIZE_MB}MB"
                 )
-            _session_images.append(img_data)
+        
+        # Downscale images once so every export embeds the small version
+        session_images = list(await asyncio.gather(
+            *(_prepare_image(img_data) for img_data in image_data)
+        ))
         
         # Process content with AI
         processor = get_ai_processor()
-        paper = await processor.process_content(raw_content, len(_session_images))
+        paper = await processor.process_content(raw_content, len(session_images))
         
-        # Store paper for export
-        _session_paper = paper
+        # Store paper and images for export
+        session_id = uuid.uuid4().hex
+        _sessions[session_id] = (paper, session_images)
         
-        return GeneratePaperResponse(success=True, paper=paper)
+        return GeneratePaperResponse(success=True, paper=paper, session_id=session_id)
         
     except ValueError as e:
         return GeneratePaperResponse(success=False, error=str(e))
@@ -83,19 +114,39 @@ async def generate_paper(
 
 
 @router.post("/export-docx")
-async def export_docx(paper: StructuredPaper):
+async def export_docx(request: ExportDocxRequest):
     """
     Export the structured paper as an IEEE-formatted DOCX file.
     
-    - Takes the structured paper data
+    - Takes the structured paper data and the generate-paper session ID
     - Generates a properly formatted Word document
     - Returns the file for download
     """
-    global _session_images
+    paper = request.paper
+    
+    images: List[PreparedImage] = []
+    if request.session_id is not None:
+        session = _sessions.get(request.session_id)
+        if session is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Session expired or not found. Please generate the paper again."
+            )
+        _, images = session
     
     try:
-        generator = get_docx_generator()
-        docx_bytes = generator.generate(paper, _session_images)
+        # Build the document in a worker process so exports use every core
+        loop = asyncio.get_running_loop()
+        paper_data = paper.model_dump()
+        pool = get_docx_pool()
+        try:
+            docx_bytes = await loop.run_in_executor(pool, generate_docx_bytes, paper_data, images)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM kill) - replace the pool and retry once
+            reset_docx_pool(pool)
+            docx_bytes = await loop.run_in_executor(
+                get_docx_pool(), generate_docx_bytes, paper_data, images
+            )
         
         # Create a safe filename from the title
         safe_title = "".join(c for c in paper.title[:50] if c.isalnum() or c in " -_").strip()
@@ -117,11 +168,9 @@ async def export_docx(paper: StructuredPaper):
 
 
 @router.post("/clear-session", response_model=MessageResponse)
-async def clear_session():
+async def clear_session(request: ClearSessionRequest):
     """Clear the session data (images and paper)."""
-    global _session_images, _session_paper
-    _session_images = []
-    _session_paper = None
+    _sessions.pop(request.session_id, None)
     return MessageResponse(message="Session cleared successfully")
 
 
@@ -5,13 +5,19 @@ This module uses Google Gemini to intelligently structure raw content
 into IEEE-formatted sections with academic tone enhancement.
 """
 
-import json
+import asyncio
 import re
 from typing import List, Optional
 import google.generativeai as genai
+import orjson
 
 from config import settings
-from models.schemas import StructuredPaper, Section, Figure
+from models.schemas import StructuredPaper
+from services.paper_cache import get_paper_cache
+
+# Precompiled patterns for extracting JSON from model responses
+_CODEBLOCK_RE = re.compile(r'```(?:json)?\s*([\s\S]*?)\s*```')
+_JSON_OBJ_RE = re.compile(r'\{[\s\S]*\}')
 
 # System prompt for IEEE paper structuring
 SYSTEM_PROMPT = """You are an expert academic writing assistant specializing in IEEE-formatted research papers.
@@ -74,6 +80,10 @@ class AIProcessor:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
         
         genai.configure(api_key=settings.GEMINI_API_KEY)
+        self._semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        
+        # The system prompt is sent as a system instruction rather than as
+        # priming turns in every request
         self.model = genai.GenerativeModel(
             model_name=settings.GEMINI_MODEL,
             generation_config={
@@ -81,51 +91,63 @@ class AIProcessor:
                 "top_p": 0.8,
                 "top_k": 40,
                 "max_output_tokens": 8192,
-            }
+            },
+            system_instruction=SYSTEM_PROMPT
         )
     
+    async def _embed_content(self, raw_content: str) -> Optional[List[float]]:
+        """Embed raw content for semantic cache lookups."""
+        try:
+            result = await genai.embed_content_async(
+                model=settings.EMBEDDING_MODEL,
+                content=raw_content,
+                task_type="semantic_similarity"
+            )
+            return result["embedding"]
+        except Exception:
+            # Semantic caching is best-effort - generate normally on failure
+            return None
+    
     def _clean_json_response(self, response_text: str) -> str:
         """Extract JSON from response, handling markdown code blocks."""
         # Remove markdown code blocks if present
-        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
-        if json_match:
-            return json_match.group(1).strip()
+        if '```' in response_text:
+            json_match = _CODEBLOCK_RE.search(response_text)
+            if json_match:
+                return json_match.group(1).strip()
         
         # Try to find JSON object directly
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
+        json_match = _JSON_OBJ_RE.search(response_text)
         if json_match:
             return json_match.group(0)
         
         return response_text
     
-    def _validate_and_fix_sections(self, sections: List[dict]) -> List[Section]:
+    def _validate_and_fix_sections(self, sections: List[dict]) -> List[dict]:
         """Validate and fix section structure."""
-        required_sections = ["Introduction", "Conclusion"]
-        section_headings = [s.get("heading", "") for s in sections]
-        
         # Ensure at least Introduction and Conclusion exist
         validated = []
         for section_data in sections:
             heading = section_data.get("heading", "Untitled Section")
             content = section_data.get("content", "")
             if content:  # Only include sections with content
-                validated.append(Section(heading=heading, content=content))
+                validated.append({"heading": heading, "content": content})
         
-        # Add missing required sections if needed
-        has_intro = any(s.heading.lower() == "introduction" for s in validated)
-        has_conclusion = any(s.heading.lower() == "conclusion" for s in validated)
+        # Add missing required sections if needed (non-string headings are
+        # rejected when the paper is validated)
+        headings = {s["heading"].lower() for s in validated if isinstance(s["heading"], str)}
         
-        if not has_intro and validated:
-            validated.insert(0, Section(
-                heading="Introduction",
-                content="This paper presents the research and findings discussed in the following sections."
-            ))
+        if "introduction" not in headings and validated:
+            validated.insert(0, {
+                "heading": "Introduction",
+                "content": "This paper presents the research and findings discussed in the following sections."
+            })
         
-        if not has_conclusion and validated:
-            validated.append(Section(
-                heading="Conclusion",
-                content="This paper has presented the key findings and contributions of the research."
-            ))
+        if "conclusion" not in headings and validated:
+            validated.append({
+                "heading": "Conclusion",
+                "content": "This paper has presented the key findings and contributions of the research."
+            })
         
         return validated
     
@@ -144,6 +166,22 @@ class AIProcessor:
         Returns:
             StructuredPaper object with all sections
         """
+        # Serve repeated content from the paper cache
+        cache = get_paper_cache()
+        cache_key = cache.make_key(raw_content, image_count)
+        cached_paper = cache.get(cache_key)
+        if cached_paper is not None:
+            return cached_paper
+        
+        embedding = None
+        if settings.USE_SEMANTIC_CACHE:
+            embedding = await self._embed_content(raw_content)
+            if embedding is not None:
+                cached_paper = cache.get_similar(embedding, image_count)
+                if cached_paper is not None:
+                    cache.put(cache_key, cached_paper, image_count)
+                    return cached_paper
+        
         # Build the user prompt
         image_note = ""
         if image_count > 0:
@@ -158,17 +196,15 @@ RAW CONTENT:
 Return ONLY valid JSON as specified in your instructions."""
 
         try:
-            # Generate response from Gemini
-            response = self.model.generate_content([
-                {"role": "user", "parts": [SYSTEM_PROMPT]},
-                {"role": "model", "parts": ["I understand. I will transform raw content into properly structured IEEE papers, returning only valid JSON. I will preserve all factual information, enhance language to academic tone, and never hallucinate content."]},
-                {"role": "user", "parts": [user_prompt]}
-            ])
+            # Generate response from Gemini (system prompt is sent as the
+            # model's system instruction, not as per-request turns)
+            async with self._semaphore:
+                response = await self.model.generate_content_async(user_prompt)
             
             # Parse the response
             response_text = response.text
             clean_json = self._clean_json_response(response_text)
-            paper_data = json.loads(clean_json)
+            paper_data = orjson.loads(clean_json)
             
             # Validate and structure the paper
             sections = self._validate_and_fix_sections(paper_data.get("sections", []))
@@ -176,26 +212,29 @@ Return ONLY valid JSON as specified in your instructions."""
             figures = []
             for fig_data in paper_data.get("figures", []):
                 if fig_data.get("index", 0) < image_count:
-                    figures.append(Figure(
-                        index=fig_data.get("index", 0),
-                        caption=fig_data.get("caption", f"Figure {fig_data.get('index', 0) + 1}"),
-                        placement=fig_data.get("placement", sections[0].heading if sections else "Introduction")
-                    ))
+                    figures.append({
+                        "index": fig_data.get("index", 0),
+                        "caption": fig_data.get("caption", f"Figure {fig_data.get('index', 0) + 1}"),
+                        "placement": fig_data.get("placement", sections[0]["heading"] if sections else "Introduction")
+                    })
             
-            # Build the structured paper
-            paper = StructuredPaper(
-                title=paper_data.get("title", "Untitled Research Paper"),
-                authors=paper_data.get("authors", "[Author Name]"),
-                abstract=paper_data.get("abstract", "Abstract not generated."),
-                keywords=paper_data.get("keywords", ["research", "study", "analysis"]),
-                sections=sections,
-                figures=figures,
-                references=paper_data.get("references", [])
-            )
+            # Build and validate the structured paper in a single pass; model
+            # output can contain nulls or wrong types, which must be rejected
+            paper = StructuredPaper.model_validate({
+                "title": paper_data.get("title", "Untitled Research Paper"),
+                "authors": paper_data.get("authors", "[Author Name]"),
+                "abstract": paper_data.get("abstract", "Abstract not generated."),
+                "keywords": paper_data.get("keywords", ["research", "study", "analysis"]),
+                "sections": sections,
+                "figures": figures,
+                "references": paper_data.get("references", [])
+            })
             
+            # Only papers that passed validation are cached
+            cache.put(cache_key, paper, image_count, embedding)
             return paper
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Failed to parse AI response as JSON: {str(e)}")
         except Exception as e:
             raise RuntimeError(f"AI processing failed: {str(e)}")
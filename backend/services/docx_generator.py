@@ -6,16 +6,35 @@ IEEE conference paper guidelines using python-docx.
 """
 
 import io
-from typing import List, Optional
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import IO, List, Optional
+from xml.sax.saxutils import escape
 from docx import Document
+from docx.document import Document as DocxDocument
 from docx.shared import Pt, Inches, Cm, Twips
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.section import WD_ORIENT
 from docx.enum.style import WD_STYLE_TYPE
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.oxml.ns import qn, nsdecls
+from docx.oxml import OxmlElement, parse_xml
 
+from config import settings
 from models.schemas import StructuredPaper, Section, Figure
+from services.image_processor import PreparedImage
+
+# Roman numerals for section headings
+_ROMAN = ("I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X")
+
+
+@dataclass
+class GenerationContext:
+    """Per-export state for a document being generated."""
+    doc: DocxDocument
+    figure_counter: int = 0
+    table_counter: int = 0
 
 
 class IEEEDocxGenerator:
@@ -40,18 +59,23 @@ class IEEEDocxGenerator:
     
     def __init__(self):
         """Initialize the document generator."""
-        self.doc = None
-        self.figure_counter = 0
-        self.table_counter = 0
+        # Build the styled page setup once and reuse it (read-only) for every export
+        template_doc = self._setup_document()
+        template = io.BytesIO()
+        template_doc.save(template)
+        self._template_bytes = template.getvalue()
+        self._body_style_id = template_doc.styles["IEEE Body"].style_id
+    
+    def _new_context(self) -> GenerationContext:
+        """Start a new document from the prebuilt IEEE template."""
+        return GenerationContext(doc=Document(io.BytesIO(self._template_bytes)))
         
-    def _setup_document(self):
+    def _setup_document(self) -> DocxDocument:
         """Set up document with IEEE formatting."""
-        self.doc = Document()
-        self.figure_counter = 0
-        self.table_counter = 0
+        doc = Document()
         
         # Set up page size (A4)
-        section = self.doc.sections[0]
+        section = doc.sections[0]
         section.page_width = self.PAGE_WIDTH
         section.page_height = self.PAGE_HEIGHT
         section.top_margin = self.MARGIN_TOP
@@ -60,90 +84,85 @@ class IEEEDocxGenerator:
         section.right_margin = self.MARGIN_RIGHT
         
         # Create custom styles
-        self._create_styles()
+        self._create_styles(doc)
+        
+        return doc
     
-    def _create_styles(self):
+    def _create_styles(self, doc: DocxDocument):
         """Create IEEE-specific paragraph styles."""
-        styles = self.doc.styles
+        # Only called on a fresh Document, so none of these styles exist yet
+        styles = doc.styles
         
         # Title Style
-        if "IEEE Title" not in [s.name for s in styles]:
-            title_style = styles.add_style("IEEE Title", WD_STYLE_TYPE.PARAGRAPH)
-            title_style.font.name = self.FONT_TITLE
-            title_style.font.size = self.FONT_SIZE_TITLE
-            title_style.font.bold = True
-            title_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            title_style.paragraph_format.space_after = Pt(12)
+        title_style = styles.add_style("IEEE Title", WD_STYLE_TYPE.PARAGRAPH)
+        title_style.font.name = self.FONT_TITLE
+        title_style.font.size = self.FONT_SIZE_TITLE
+        title_style.font.bold = True
+        title_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        title_style.paragraph_format.space_after = Pt(12)
         
         # Author Style
-        if "IEEE Author" not in [s.name for s in styles]:
-            author_style = styles.add_style("IEEE Author", WD_STYLE_TYPE.PARAGRAPH)
-            author_style.font.name = self.FONT_TITLE
-            author_style.font.size = self.FONT_SIZE_AUTHOR
-            author_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            author_style.paragraph_format.space_after = Pt(12)
+        author_style = styles.add_style("IEEE Author", WD_STYLE_TYPE.PARAGRAPH)
+        author_style.font.name = self.FONT_TITLE
+        author_style.font.size = self.FONT_SIZE_AUTHOR
+        author_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        author_style.paragraph_format.space_after = Pt(12)
         
         # Abstract Label Style
-        if "IEEE Abstract Label" not in [s.name for s in styles]:
-            abs_label = styles.add_style("IEEE Abstract Label", WD_STYLE_TYPE.PARAGRAPH)
-            abs_label.font.name = self.FONT_TITLE
-            abs_label.font.size = self.FONT_SIZE_ABSTRACT
-            abs_label.font.bold = True
-            abs_label.font.italic = True
-            abs_label.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            abs_label.paragraph_format.space_after = Pt(6)
+        abs_label = styles.add_style("IEEE Abstract Label", WD_STYLE_TYPE.PARAGRAPH)
+        abs_label.font.name = self.FONT_TITLE
+        abs_label.font.size = self.FONT_SIZE_ABSTRACT
+        abs_label.font.bold = True
+        abs_label.font.italic = True
+        abs_label.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        abs_label.paragraph_format.space_after = Pt(6)
         
         # Abstract Text Style
-        if "IEEE Abstract" not in [s.name for s in styles]:
-            abs_style = styles.add_style("IEEE Abstract", WD_STYLE_TYPE.PARAGRAPH)
-            abs_style.font.name = self.FONT_TITLE
-            abs_style.font.size = self.FONT_SIZE_ABSTRACT
-            abs_style.font.italic = True
-            abs_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            abs_style.paragraph_format.space_after = Pt(12)
+        abs_style = styles.add_style("IEEE Abstract", WD_STYLE_TYPE.PARAGRAPH)
+        abs_style.font.name = self.FONT_TITLE
+        abs_style.font.size = self.FONT_SIZE_ABSTRACT
+        abs_style.font.italic = True
+        abs_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        abs_style.paragraph_format.space_after = Pt(12)
         
         # Section Heading Style (Small Caps simulated with uppercase)
-        if "IEEE Heading" not in [s.name for s in styles]:
-            heading_style = styles.add_style("IEEE Heading", WD_STYLE_TYPE.PARAGRAPH)
-            heading_style.font.name = self.FONT_TITLE
-            heading_style.font.size = self.FONT_SIZE_HEADING
-            heading_style.font.bold = True
-            heading_style.paragraph_format.space_before = Pt(12)
-            heading_style.paragraph_format.space_after = Pt(6)
-            heading_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        heading_style = styles.add_style("IEEE Heading", WD_STYLE_TYPE.PARAGRAPH)
+        heading_style.font.name = self.FONT_TITLE
+        heading_style.font.size = self.FONT_SIZE_HEADING
+        heading_style.font.bold = True
+        heading_style.paragraph_format.space_before = Pt(12)
+        heading_style.paragraph_format.space_after = Pt(6)
+        heading_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
         # Body Text Style
-        if "IEEE Body" not in [s.name for s in styles]:
-            body_style = styles.add_style("IEEE Body", WD_STYLE_TYPE.PARAGRAPH)
-            body_style.font.name = self.FONT_TITLE
-            body_style.font.size = self.FONT_SIZE_BODY
-            body_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            body_style.paragraph_format.first_line_indent = Inches(0.25)
-            body_style.paragraph_format.space_after = Pt(0)
-            body_style.paragraph_format.line_spacing = 1.0
+        body_style = styles.add_style("IEEE Body", WD_STYLE_TYPE.PARAGRAPH)
+        body_style.font.name = self.FONT_TITLE
+        body_style.font.size = self.FONT_SIZE_BODY
+        body_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        body_style.paragraph_format.first_line_indent = Inches(0.25)
+        body_style.paragraph_format.space_after = Pt(0)
+        body_style.paragraph_format.line_spacing = 1.0
         
         # Caption Style
-        if "IEEE Caption" not in [s.name for s in styles]:
-            caption_style = styles.add_style("IEEE Caption", WD_STYLE_TYPE.PARAGRAPH)
-            caption_style.font.name = self.FONT_TITLE
-            caption_style.font.size = self.FONT_SIZE_CAPTION
-            caption_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            caption_style.paragraph_format.space_before = Pt(6)
-            caption_style.paragraph_format.space_after = Pt(12)
+        caption_style = styles.add_style("IEEE Caption", WD_STYLE_TYPE.PARAGRAPH)
+        caption_style.font.name = self.FONT_TITLE
+        caption_style.font.size = self.FONT_SIZE_CAPTION
+        caption_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        caption_style.paragraph_format.space_before = Pt(6)
+        caption_style.paragraph_format.space_after = Pt(12)
         
         # Keywords Style
-        if "IEEE Keywords" not in [s.name for s in styles]:
-            kw_style = styles.add_style("IEEE Keywords", WD_STYLE_TYPE.PARAGRAPH)
-            kw_style.font.name = self.FONT_TITLE
-            kw_style.font.size = self.FONT_SIZE_ABSTRACT
-            kw_style.font.italic = True
-            kw_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            kw_style.paragraph_format.space_after = Pt(12)
+        kw_style = styles.add_style("IEEE Keywords", WD_STYLE_TYPE.PARAGRAPH)
+        kw_style.font.name = self.FONT_TITLE
+        kw_style.font.size = self.FONT_SIZE_ABSTRACT
+        kw_style.font.italic = True
+        kw_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        kw_style.paragraph_format.space_after = Pt(12)
     
-    def _set_two_column(self):
+    def _set_two_column(self, ctx: GenerationContext):
         """Add a section break and set two-column layout."""
         # Add section break for two columns
-        new_section = self.doc.add_section()
+        new_section = ctx.doc.add_section()
         new_section.page_width = self.PAGE_WIDTH
         new_section.page_height = self.PAGE_HEIGHT
         new_section.top_margin = self.MARGIN_TOP
@@ -158,87 +177,106 @@ class IEEEDocxGenerator:
         cols.set(qn('w:space'), str(int(self.COLUMN_GAP.twips)))
         sectPr.append(cols)
     
-    def _add_title(self, title: str):
+    def _add_title(self, ctx: GenerationContext, title: str):
         """Add paper title."""
-        p = self.doc.add_paragraph(title, style="IEEE Title")
+        p = ctx.doc.add_paragraph(title, style="IEEE Title")
     
-    def _add_authors(self, authors: str):
+    def _add_authors(self, ctx: GenerationContext, authors: str):
         """Add author information."""
-        p = self.doc.add_paragraph(authors, style="IEEE Author")
+        p = ctx.doc.add_paragraph(authors, style="IEEE Author")
     
-    def _add_abstract(self, abstract: str):
+    def _add_abstract(self, ctx: GenerationContext, abstract: str):
         """Add abstract section."""
         # Abstract label
-        p = self.doc.add_paragraph(style="IEEE Abstract Label")
+        p = ctx.doc.add_paragraph(style="IEEE Abstract Label")
         run = p.add_run("Abstract—")
         run.bold = True
         run.italic = True
         run.add_text(abstract)
         p.style = "IEEE Abstract"
     
-    def _add_keywords(self, keywords: List[str]):
+    def _add_keywords(self, ctx: GenerationContext, keywords: List[str]):
         """Add keywords."""
-        p = self.doc.add_paragraph(style="IEEE Keywords")
+        p = ctx.doc.add_paragraph(style="IEEE Keywords")
         run = p.add_run("Keywords—")
         run.bold = True
         run.italic = True
         p.add_run("; ".join(keywords))
     
-    def _add_section_heading(self, heading: str, number: int):
+    def _add_section_heading(self, ctx: GenerationContext, heading: str, number: int):
         """Add a section heading with Roman numeral."""
-        roman_numerals = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X"]
-        numeral = roman_numerals[number - 1] if number <= len(roman_numerals) else str(number)
+        numeral = _ROMAN[number - 1] if number <= len(_ROMAN) else str(number)
+        heading_text = f"{numeral}. {heading.upper()}"
         
-        p = self.doc.add_paragraph(style="IEEE Heading")
-        run = p.add_run(f"{numeral}. {heading.upper()}")
+        p = ctx.doc.add_paragraph(style="IEEE Heading")
+        run = p.add_run(heading_text)
         run.bold = True
     
-    def _add_body_text(self, content: str):
+    def _add_body_text(self, ctx: GenerationContext, content: str):
         """Add body text with proper formatting."""
-        # Split content into paragraphs
-        paragraphs = content.strip().split('\n\n')
-        for para_text in paragraphs:
-            para_text = para_text.strip()
+        # Split content into paragraphs and build their OOXML directly
+        paragraphs_xml = []
+        for para_text in content.strip().split('\n\n'):
+            # Clean up the text
+            para_text = ' '.join(para_text.split())
             if para_text:
-                # Clean up the text
-                para_text = ' '.join(para_text.split())
-                p = self.doc.add_paragraph(para_text, style="IEEE Body")
+                paragraphs_xml.append(
+                    f'<w:p><w:pPr><w:pStyle w:val="{self._body_style_id}"/></w:pPr>'
+                    f'<w:r><w:t xml:space="preserve">{escape(para_text)}</w:t></w:r></w:p>'
+                )
+        if not paragraphs_xml:
+            return
+        
+        # Parse all paragraphs at once and insert them ahead of the body's sectPr
+        fragment = parse_xml(f'<w:body {nsdecls("w")}>{"".join(paragraphs_xml)}</w:body>')
+        body = ctx.doc.element.body
+        sect_pr = body.sectPr
+        for p in list(fragment):
+            if sect_pr is not None:
+                sect_pr.addprevious(p)
+            else:
+                body.append(p)
     
-    def _add_figure(self, image_data: bytes, caption: str):
+    def _add_figure(self, ctx: GenerationContext, image: PreparedImage, caption: str):
         """Add a figure with caption."""
-        self.figure_counter += 1
+        ctx.figure_counter += 1
         
-        # Add image
-        try:
-            image_stream = io.BytesIO(image_data)
-            self.doc.add_picture(image_stream, width=Inches(3.0))
-            
-            # Center the last paragraph (which contains the image)
-            last_paragraph = self.doc.paragraphs[-1]
-            last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        except Exception:
+        # Add image (skip images that already failed to decode at upload)
+        added = False
+        if image is not None:
+            try:
+                ctx.doc.add_picture(io.BytesIO(image), width=Inches(3.0))
+                
+                # Center the last paragraph (which contains the image)
+                last_paragraph = ctx.doc.paragraphs[-1]
+                last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                added = True
+            except Exception:
+                pass
+        
+        if not added:
             # If image fails, add placeholder text
-            p = self.doc.add_paragraph("[Image could not be processed]")
+            p = ctx.doc.add_paragraph("[Image could not be processed]")
             p.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
         # Add caption
-        p = self.doc.add_paragraph(style="IEEE Caption")
-        run = p.add_run(f"Fig. {self.figure_counter}. ")
+        p = ctx.doc.add_paragraph(style="IEEE Caption")
+        run = p.add_run(f"Fig. {ctx.figure_counter}. ")
         run.bold = True
         p.add_run(caption)
     
-    def _add_references(self, references: List[str]):
+    def _add_references(self, ctx: GenerationContext, references: List[str]):
         """Add references section."""
-        self._add_section_heading("References", 99)  # Will show as "REFERENCES"
+        self._add_section_heading(ctx, "References", 99)  # Will show as "REFERENCES"
         
         # Override the last heading to not show number
-        last_para = self.doc.paragraphs[-1]
+        last_para = ctx.doc.paragraphs[-1]
         last_para.clear()
         run = last_para.add_run("REFERENCES")
         run.bold = True
         
         for i, ref in enumerate(references, 1):
-            p = self.doc.add_paragraph(style="IEEE Body")
+            p = ctx.doc.add_paragraph(style="IEEE Body")
             p.paragraph_format.first_line_indent = Inches(0)
             p.paragraph_format.left_indent = Inches(0.25)
             p.paragraph_format.first_line_indent = Inches(-0.25)
@@ -247,74 +285,66 @@ class IEEEDocxGenerator:
     def generate(
         self, 
         paper: StructuredPaper,
-        images: Optional[List[bytes]] = None
-    ) -> bytes:
+        images: Optional[List[PreparedImage]],
+        out: IO[bytes]
+    ) -> None:
         """
         Generate IEEE-formatted DOCX document.
         
         Args:
             paper: StructuredPaper object with all content
-            images: Optional list of image bytes
-            
-        Returns:
-            Bytes of the generated DOCX file
+            images: Optional list of prepared image bytes (None if undecodable)
+            out: Binary stream the DOCX file is written to
         """
         images = images or []
         
-        # Set up document
-        self._setup_document()
+        # Set up a fresh document for this export only
+        ctx = self._new_context()
         
         # Add title and authors (single column)
-        self._add_title(paper.title)
-        self._add_authors(paper.authors)
+        self._add_title(ctx, paper.title)
+        self._add_authors(ctx, paper.authors)
         
         # Add abstract and keywords (still single column for now)
-        self._add_abstract(paper.abstract)
-        self._add_keywords(paper.keywords)
+        self._add_abstract(ctx, paper.abstract)
+        self._add_keywords(ctx, paper.keywords)
         
         # Switch to two-column layout
-        self._set_two_column()
+        self._set_two_column(ctx)
         
         # Build a map of figures by section
-        figures_by_section = {}
+        figures_by_section = defaultdict(list)
         for fig in paper.figures:
-            section_name = fig.placement.lower()
-            if section_name not in figures_by_section:
-                figures_by_section[section_name] = []
-            figures_by_section[section_name].append(fig)
+            figures_by_section[fig.placement.lower()].append(fig)
         
         # Add sections
         for i, section in enumerate(paper.sections, 1):
-            self._add_section_heading(section.heading, i)
-            self._add_body_text(section.content)
+            self._add_section_heading(ctx, section.heading, i)
+            self._add_body_text(ctx, section.content)
             
             # Add figures for this section
-            section_key = section.heading.lower()
-            if section_key in figures_by_section:
-                for fig in figures_by_section[section_key]:
+            section_figures = figures_by_section.get(section.heading.lower())
+            if section_figures:
+                for fig in section_figures:
                     if fig.index < len(images):
-                        self._add_figure(images[fig.index], fig.caption)
+                        self._add_figure(ctx, images[fig.index], fig.caption)
         
         # Add any remaining images not placed in sections
         placed_indices = {fig.index for fig in paper.figures}
-        for i, img_data in enumerate(images):
+        for i, image in enumerate(images):
             if i not in placed_indices:
-                self.figure_counter += 1
-                self._add_figure(img_data, f"Figure {self.figure_counter}")
+                ctx.figure_counter += 1
+                self._add_figure(ctx, image, f"Figure {ctx.figure_counter}")
         
         # Add references if present
         if paper.references:
-            self._add_references(paper.references)
+            self._add_references(ctx, paper.references)
         
-        # Save to bytes
-        output = io.BytesIO()
-        self.doc.save(output)
-        output.seek(0)
-        
-        return output.getvalue()
+        # Write directly to the output stream
+        ctx.doc.save(out)
 
 
-# Singleton instance
+# Singleton instance (one per process)
 _generator: Optional[IEEEDocxGenerator] = None
 
 def get_docx_generator() -> IEEEDocxGenerator:
@@ -323,3 +353,41 @@ def get_docx_generator() -> IEEEDocxGenerator:
     if _generator is None:
         _generator = IEEEDocxGenerator()
     return _generator
+
+
+def generate_docx_bytes(paper_data: dict, images: List[PreparedImage]) -> bytes:
+    """Generate a DOCX file in a worker process and return its bytes."""
+    paper = StructuredPaper.model_validate(paper_data)
+    output = io.BytesIO()
+    get_docx_generator().generate(paper, images, output)
+    return output.getvalue()
+
+
+# Worker pool for CPU-bound document generation
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_docx_pool() -> ProcessPoolExecutor:
+    """Get or create the DOCX generation process pool."""
+    global _pool
+    if _pool is None:
+        # Never fork: the server process runs gRPC threads from the Gemini SDK
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.DOCX_WORKERS,
+            mp_context=multiprocessing.get_context(start_method)
+        )
+    return _pool
+
+def reset_docx_pool(broken_pool: ProcessPoolExecutor):
+    """Replace the pool after a worker died, unless already replaced."""
+    global _pool
+    if _pool is broken_pool:
+        _pool.shutdown(wait=False)
+        _pool = None
+
+def shutdown_docx_pool():
+    """Shut down the DOCX generation process pool, if started."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
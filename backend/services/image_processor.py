@@ -0,0 +1,59 @@
+"""
+Image Preprocessing Service.
+
+This module downscales and re-encodes uploaded images before they are
+embedded in the generated document, so figures rendered at column width
+do not carry their full original resolution into the DOCX file.
+"""
+
+import io
+from typing import Optional
+from PIL import Image, ImageOps
+
+from config import settings
+
+# Downscaled JPEG bytes, or None for uploads that could not be decoded
+PreparedImage = Optional[bytes]
+
+
+def prepare_image(data: bytes) -> PreparedImage:
+    """
+    Downscale an uploaded image and re-encode it as JPEG.
+    
+    Args:
+        data: Raw bytes of the uploaded image
+    
+    Returns:
+        JPEG bytes no larger than IMAGE_MAX_DIMENSION_PX on either side,
+        or None if the image cannot be decoded or exceeds IMAGE_MAX_PIXELS
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            # Only the header has been read so far - refuse decompression
+            # bombs before any pixel data is decoded
+            if img.width * img.height > settings.IMAGE_MAX_PIXELS:
+                return None
+            
+            # Downscale first so JPEGs are decoded at reduced size via draft()
+            max_dim = settings.IMAGE_MAX_DIMENSION_PX
+            img.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+            
+            # Apply camera rotation (EXIF is kept on the thumbnail)
+            img = ImageOps.exif_transpose(img)
+            
+            # JPEG has no alpha channel - flatten transparency onto white
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            
+            output = io.BytesIO()
+            img.save(output, format="JPEG", quality=settings.IMAGE_JPEG_QUALITY, optimize=True)
+            return output.getvalue()
+    except Exception:
+        # Drop undecodable data so it is not held in the session; the DOCX
+        # generator adds a placeholder instead
+        return None
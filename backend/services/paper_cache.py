@@ -0,0 +1,236 @@
+"""
+Paper Cache Service.
+
+This module caches structured papers generated by the AI processor so that
+repeated requests with identical (or, optionally, near-identical) content
+skip the Gemini round trip entirely.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import faiss
+import numpy as np
+import orjson
+from pydantic import ValidationError
+
+from config import settings
+from models.schemas import StructuredPaper
+
+logger = logging.getLogger(__name__)
+
+
+class PaperCache:
+    """LRU cache of generated papers with an optional embedding-similarity tier."""
+    
+    # Nearest neighbours to inspect when filtering semantic hits by image count
+    SEARCH_K = 8
+    
+    def __init__(self, maxsize: int = 256, similarity_threshold: float = 0.95):
+        """Initialize an empty cache."""
+        self.maxsize = maxsize
+        self.similarity_threshold = similarity_threshold
+        self._store: "OrderedDict[str, str]" = OrderedDict()
+        self._image_counts: Dict[str, int] = {}
+        
+        # Semantic tier: normalized embeddings in a faiss inner-product index,
+        # so inner product equals cosine similarity
+        self._index: Optional[faiss.IndexIDMap2] = None
+        self._ids: Dict[int, str] = {}
+        self._key_ids: Dict[str, int] = {}
+        self._next_id = 0
+    
+    @staticmethod
+    def make_key(raw_content: str, image_count: int) -> str:
+        """Build the exact-match key for a generation request."""
+        digest = hashlib.blake2b(raw_content.encode(), digest_size=16)
+        digest.update(f"|{image_count}".encode())
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[StructuredPaper]:
+        """Return the cached paper for an exact key, if present."""
+        paper_json = self._store.get(key)
+        if paper_json is None:
+            return None
+        
+        try:
+            paper = StructuredPaper.model_validate_json(paper_json)
+        except ValidationError:
+            # Undecodable entry (e.g. a stale file from load()) - treat as a miss
+            self._remove(key)
+            return None
+        
+        self._store.move_to_end(key)
+        return paper
+    
+    def get_similar(self, embedding: List[float], image_count: int) -> Optional[StructuredPaper]:
+        """Return the most similar cached paper above the similarity threshold."""
+        if self._index is None or self._index.ntotal == 0:
+            return None
+        
+        query = self._normalize(embedding)
+        scores, ids = self._index.search(query, min(self.SEARCH_K, self._index.ntotal))
+        
+        # Only papers generated for the same number of images are reusable
+        for score, vector_id in zip(scores[0], ids[0]):
+            if vector_id < 0 or score <= self.similarity_threshold:
+                break
+            key = self._ids[int(vector_id)]
+            if self._image_counts.get(key) == image_count:
+                return self.get(key)
+        
+        return None
+    
+    def put(
+        self,
+        key: str,
+        paper: StructuredPaper,
+        image_count: int,
+        embedding: Optional[List[float]] = None
+    ):
+        """Store a validated paper, evicting the least recently used entry if full."""
+        self._put_json(key, paper.model_dump_json(), image_count)
+        
+        if embedding is not None and key not in self._key_ids:
+            self._add_vector(key, self._normalize(embedding), self._next_id)
+        
+        self._evict()
+    
+    def clear(self):
+        """Remove all cached papers."""
+        self._store.clear()
+        self._image_counts.clear()
+        self._index = None
+        self._ids.clear()
+        self._key_ids.clear()
+        self._next_id = 0
+    
+    def save(self, path: str):
+        """Persist the cached papers and embedding index to disk."""
+        entries = [
+            {
+                "key": key,
+                "paper": paper_json,
+                "image_count": self._image_counts[key],
+                "vector_id": self._key_ids.get(key)
+            }
+            for key, paper_json in self._store.items()
+        ]
+        
+        def write_entries(tmp_path: str):
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(entries))
+        
+        self._replace_file(f"{path}.json", write_entries)
+        
+        if self._index is not None:
+            index = self._index
+            self._replace_file(f"{path}.faiss", lambda tmp_path: faiss.write_index(index, tmp_path))
+        elif os.path.exists(f"{path}.faiss"):
+            os.remove(f"{path}.faiss")
+    
+    def load(self, path: str):
+        """Restore cached papers and embeddings saved with save()."""
+        if not os.path.exists(f"{path}.json"):
+            return
+        
+        self.clear()
+        try:
+            self._load_files(path)
+        except (OSError, ValueError, KeyError, TypeError, RuntimeError) as e:
+            # The cache is best effort - never let a bad file block startup
+            logger.warning("Discarding unreadable paper cache at %s: %s", path, e)
+            self.clear()
+    
+    def _load_files(self, path: str):
+        """Read the files written by save() into the empty cache."""
+        with open(f"{path}.json", "rb") as f:
+            entries = orjson.loads(f.read())
+        
+        index = None
+        if os.path.exists(f"{path}.faiss"):
+            index = faiss.read_index(f"{path}.faiss")
+        
+        for entry in entries:
+            key = entry["key"]
+            self._put_json(key, entry["paper"], entry["image_count"])
+            
+            vector_id = entry["vector_id"]
+            if index is not None and vector_id is not None:
+                try:
+                    vector = index.reconstruct(vector_id)
+                except RuntimeError:
+                    # Not in the saved index - keep it as an exact-match entry
+                    continue
+                self._add_vector(key, vector[np.newaxis, :], vector_id)
+        
+        self._evict()
+    
+    @staticmethod
+    def _replace_file(path: str, write: Callable[[str], None]):
+        """Write a file under a temporary name, then atomically move it into place."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    
+    def _put_json(self, key: str, paper_json: str, image_count: int):
+        """Store serialized paper data as the most recently used entry."""
+        if key in self._store:
+            self._store.move_to_end(key)
+        self._store[key] = paper_json
+        self._image_counts[key] = image_count
+    
+    def _add_vector(self, key: str, vector: np.ndarray, vector_id: int):
+        """Add a normalized embedding for a cached key."""
+        if self._index is None:
+            self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+        self._index.add_with_ids(vector, np.array([vector_id], dtype=np.int64))
+        self._ids[vector_id] = key
+        self._key_ids[key] = vector_id
+        self._next_id = max(self._next_id, vector_id + 1)
+    
+    def _remove(self, key: str):
+        """Drop a cached paper and its embedding."""
+        self._store.pop(key, None)
+        self._image_counts.pop(key, None)
+        
+        vector_id = self._key_ids.pop(key, None)
+        if vector_id is not None:
+            self._index.remove_ids(np.array([vector_id], dtype=np.int64))
+            del self._ids[vector_id]
+    
+    def _evict(self):
+        """Drop least recently used entries until the cache fits."""
+        while len(self._store) > self.maxsize:
+            self._remove(next(iter(self._store)))
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 row vector."""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+
+# Singleton instance
+_cache: Optional[PaperCache] = None
+
+def get_paper_cache() -> PaperCache:
+    """Get or create the paper cache singleton."""
+    global _cache
+    if _cache is None:
+        _cache = PaperCache(
+            maxsize=settings.PAPER_CACHE_SIZE,
+            similarity_threshold=settings.SEMANTIC_CACHE_THRESHOLD
+        )
+        if settings.PAPER_CACHE_PATH:
+            _cache.load(settings.PAPER_CACHE_PATH)
+    return _cache
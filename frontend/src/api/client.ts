@@ -44,10 +44,13 @@ export async function generatePaper(
 /**
  * Export the paper as a DOCX file
  */
-export async function exportDocx(paper: StructuredPaper): Promise<Blob> {
+export async function exportDocx(
+    paper: StructuredPaper,
+    sessionId: string | null
+): Promise<Blob> {
     const response = await apiClient.post(
         '/api/export-docx',
-        paper,
+        { paper, session_id: sessionId },
         {
             responseType: 'blob',
             headers: {
@@ -62,8 +65,8 @@ export async function exportDocx(paper: StructuredPaper): Promise<Blob> {
 /**
  * Clear the current session
  */
-export async function clearSession(): Promise<void> {
-    await apiClient.post('/api/clear-session');
+export async function clearSession(sessionId: string): Promise<void> {
+    await apiClient.post('/api/clear-session', { session_id: sessionId });
 }
 
 /**
@@ -33,6 +33,11 @@ export default function EditorPage() {
             if (response.success && response.paper) {
                 // Store paper in session storage for output page
                 sessionStorage.setItem('generatedPaper', JSON.stringify(response.paper));
+                if (response.session_id) {
+                    sessionStorage.setItem('sessionId', response.session_id);
+                } else {
+                    sessionStorage.removeItem('sessionId');
+                }
                 navigate('/output');
             } else {
                 setError(response.error || 'Failed to generate paper. Please try again.');
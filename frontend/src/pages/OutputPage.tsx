@@ -6,7 +6,7 @@ import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import PaperPreview from '../components/PaperPreview';
 import SectionNav from '../components/SectionNav';
-import { exportDocx } from '../api/client';
+import { clearSession, exportDocx } from '../api/client';
 import type { StructuredPaper } from '../types/paper';
 
 export default function OutputPage() {
@@ -37,7 +37,7 @@ export default function OutputPage() {
         setError(null);
 
         try {
-            const blob = await exportDocx(paper);
+            const blob = await exportDocx(paper, sessionStorage.getItem('sessionId'));
 
             // Create download link
             const url = window.URL.createObjectURL(blob);
@@ -57,7 +57,12 @@ export default function OutputPage() {
     };
 
     const handleCreateNew = () => {
+        const sessionId = sessionStorage.getItem('sessionId');
+        if (sessionId) {
+            clearSession(sessionId).catch(() => {});
+        }
         sessionStorage.removeItem('generatedPaper');
+        sessionStorage.removeItem('sessionId');
         navigate('/editor');
     };
 
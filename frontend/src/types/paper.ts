@@ -26,6 +26,7 @@ export interface StructuredPaper {
 export interface GeneratePaperResponse {
     success: boolean;
     paper?: StructuredPaper;
+    session_id?: string;
     error?: string;
 }
 